@@ -1,11 +1,23 @@
 # app.py
 import os
 import io
+import re
+import queue
+import threading
 import base64
+import httpx
 import streamlit as st
 from PIL import Image
+from pillow_heif import register_heif_opener
 from google import genai
 from google.genai import types
+from google.genai import errors
+from concurrent.futures import ThreadPoolExecutor
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Plain Pillow can't decode HEIC/HEIF phone photos; this lets Image.open read them
+register_heif_opener()
 
 # ---------------------------
 # PAGE CONFIG & THEME
@@ -16,15 +28,68 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ---------------------------
+# STATIC STYLES
+# ---------------------------
+_SIDEBAR_CSS = """
+    <style>
+    /* Normal button style */
+    .stButton>button, [data-testid="stFormSubmitButton"] button {
+        background-color: #4CAF50;  /* Green */
+        color: white;
+        border-radius: 8px;
+        padding: 10px 24px;
+        transition: 0.3s;  /* Smooth hover effect */
+    }
+    /* Hover effect */
+    .stButton>button:hover, [data-testid="stFormSubmitButton"] button:hover {
+        background-color: #45a049;  /* Darker green when hovering */
+        color: yellow;
+    }
+    </style>
+"""
+
+_FOOTER_HTML = """
+    <style>
+    .footer {
+        position: fixed;
+        left: 0;
+        bottom: 0;
+        width: 100%;
+        background-color: #f1f1f1;
+        color: #333;
+        text-align: center;
+        padding: 10px;
+        font-size: 14px;
+        box-shadow: 0 -2px 5px rgba(0,0,0,0.1);
+        z-index: 9999;
+    }
+    .footer .small-text {
+        font-size: 12px;
+        color: #555;
+        margin-right: 5px;
+    }
+    .footer .big-text {
+        font-size: 16px;
+        font-weight: bold;
+        color: #000;
+    }
+    </style>
+    <div class="footer">
+        <span class="small-text">Made by</span>
+        <span class="big-text">IFTAKHAR</span>
+    </div>
+"""
+
 # ---------------------------
 # BACKGROUND IMAGE FUNCTION
 # ---------------------------
-def add_bg_from_local(image_file):
-    """Applies a local background image in base64 encoding."""
+@st.cache_data(show_spinner=False)
+def _bg_css(image_file):
+    """Builds the background <style> block once per app lifetime."""
     with open(image_file, "rb") as f:
         encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
+    return f"""
         <style>
         [data-testid="stAppViewContainer"] {{
             background-image: url("data:image/png;base64,{encoded}");
@@ -46,9 +111,11 @@ def add_bg_from_local(image_file):
             box-shadow: 0 4px 12px rgba(0,0,0,0.1);
         }}
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+        """
+
+def add_bg_from_local(image_file):
+    """Applies a local background image in base64 encoding."""
+    st.markdown(_bg_css(image_file), unsafe_allow_html=True)
 
 # ✅ Replace this path with your local image file
 add_bg_from_local("images/farmer_bg.jpg")  # Example: place your image here
@@ -62,16 +129,28 @@ st.caption("Your friendly AI farm companion — diagnose, manage, and protect yo
 # ---------------------------
 # GEMINI CONFIG
 # ---------------------------
+@st.cache_resource(show_spinner=False)
+def get_client(api_key):
+    """Shared Gemini client, reused across reruns and sessions."""
+    return genai.Client(api_key=api_key)
+
 GEMINI_KEY = os.environ.get("GEMINI_API_KEY") or st.secrets.get("GEMINI_API_KEY", None)
 if not GEMINI_KEY:
     st.error("❌ Gemini API key not set. Please add it in environment or Streamlit secrets.")
     st.stop()
 
-client = genai.Client()
+client = get_client(GEMINI_KEY)
 
 # ---------------------------
 # SIDEBAR: IMAGE UPLOAD & CONTROLS
 # ---------------------------
+ACTION_FIND_DISEASE = "🔬 Find Disease (Auto)"
+ACTION_SUGGESTIONS = "🩺 Suggestions & Advice"
+ACTION_CUSTOM = "❓ Ask (Custom Prompt)"
+ACTION_CLEAR = "🗑️ Clear All Results"
+ACTION_COMPARE = "📊 Compare All Results"
+ACTIONS = [ACTION_FIND_DISEASE, ACTION_SUGGESTIONS, ACTION_CUSTOM, ACTION_CLEAR, ACTION_COMPARE]
+
 with st.sidebar:
     st.header("📸 Upload Image")
     uploaded_file = st.file_uploader(
@@ -89,29 +168,26 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown("### ⚙️ Actions")
-    st.markdown("""
-    <style>
-    /* Normal button style */
-    .stButton>button {
-        background-color: #4CAF50;  /* Green */
-        color: white;
-        border-radius: 8px;
-        padding: 10px 24px;
-        transition: 0.3s;  /* Smooth hover effect */
-    }
-    /* Hover effect */
-    .stButton>button:hover {
-        background-color: #45a049;  /* Darker green when hovering */
-        color: yellow;
-    }
-    </style>
-""", unsafe_allow_html=True)
+    st.markdown(_SIDEBAR_CSS, unsafe_allow_html=True)
+
+    # A form batches its widgets: typing a question or picking an action doesn't rerun the script
+    with st.form("controls"):
+        action = st.radio("Choose an action", ACTIONS)
+        custom_user_prompt = st.text_input(
+            "💬 Custom Question",
+            placeholder="e.g. What lab test should I run to confirm fungal infection?"
+        )
+        separate_analysis = st.checkbox(
+            "Analyze each image separately",
+            help="Send one request per image instead of a single combined request."
+        )
+        submitted = st.form_submit_button("▶️ Run")
 
-    find_disease = st.button("🔬 Find Disease (Auto)")
-    suggestions = st.button("🩺 Suggestions & Advice")
-    custom_question = st.button("❓ Ask (Custom Prompt)")
-    clear_results = st.button("🗑️ Clear All Results")
-    compare_results = st.button("📊 Compare All Results")
+    find_disease = submitted and action == ACTION_FIND_DISEASE
+    suggestions = submitted and action == ACTION_SUGGESTIONS
+    custom_question = submitted and action == ACTION_CUSTOM
+    clear_results = submitted and action == ACTION_CLEAR
+    compare_results = submitted and action == ACTION_COMPARE
 
 # ---------------------------
 # SESSION STATE
@@ -129,21 +205,241 @@ if "comparison_data" not in st.session_state:
 # ---------------------------
 # GEMINI HELPER FUNCTION
 # ---------------------------
-def call_gemini_with_image(image_bytes: bytes, prompt_text: str, thinking_budget: int = 0):
+GEMINI_MODEL = "gemini-2.5-flash"
+MAX_ATTEMPTS = 5
+MAX_WORKERS = 8
+MAX_IMAGE_DIM = 1568  # Gemini vision tile size
+MAX_PASSTHROUGH_BYTES = 4 * 1024 * 1024
+PASSTHROUGH_MIME_TYPES = {"image/jpeg", "image/png", "image/webp"}
+MAX_RESULTS = 20
+
+def _is_transient(exc: BaseException) -> bool:
+    """Rate limits, server errors and network hiccups are worth retrying; bad requests are not."""
+    if isinstance(exc, errors.APIError):
+        return exc.code == 429 or (exc.code or 0) >= 500
+    return isinstance(exc, (httpx.TransportError, TimeoutError))
+
+@retry(
+    retry=retry_if_exception(_is_transient),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    stop=stop_after_attempt(MAX_ATTEMPTS),
+    reraise=True,
+)
+def _stream_response(contents, cfg, model: str, on_text=None):
+    """Streams one Gemini response, returning the full text.
+
+    Only failures before the first chunk are retried; once part of the answer
+    has streamed (and been billed), replaying the request would pay for it twice.
+    """
+    text = ""
+    started = False
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=model, contents=contents, config=cfg
+        ):
+            started = True
+            text += chunk.text or ""
+            if on_text:
+                on_text(text)
+    except Exception as e:
+        if started and _is_transient(e):
+            raise RuntimeError(f"Gemini stream interrupted: {e}") from e
+        raise
+    return text
+
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False, max_entries=128)
+def _generate_cached(images: tuple, prompt_text: str, thinking_budget: int, model: str, _on_text=None):
+    """Cached Gemini call; repeat clicks on the same image(s) + prompt skip the API.
+
+    `images` holds (bytes, mime_type) pairs. The response is streamed;
+    `_on_text` (not part of the cache key) receives the text accumulated so
+    far after every chunk.
+    """
+    contents = [types.Part.from_bytes(data=b, mime_type=mime) for b, mime in images]
+    contents.append(prompt_text)
+    cfg = types.GenerateContentConfig(
+        thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget)
+    )
+    return _stream_response(contents, cfg, model, _on_text)
+
+def call_gemini_with_image(image_bytes: bytes, prompt_text: str, thinking_budget: int = 0, mime_type: str = "image/jpeg"):
     """Send image + prompt to Gemini 2.5 Flash."""
     try:
-        img_part = types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
-        contents = [img_part, prompt_text]
-        cfg = types.GenerateContentConfig(
-            thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget)
-        )
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", contents=contents, config=cfg
-        )
-        return response.text
+        # Errors are raised (not returned) inside the cached call so they are never cached
+        return _generate_cached(((image_bytes, mime_type),), prompt_text, thinking_budget, GEMINI_MODEL)
     except Exception as e:
         return f"⚠️ Error calling Gemini API: {e}"
 
+class _StreamCancelled(Exception):
+    """Raised in the worker to abandon a stream the script thread stopped waiting for."""
+
+def _stream_into(placeholder, images: tuple, prompt_text: str, thinking_budget: int):
+    """Run the cached call in a worker thread, mirroring partial text into `placeholder`.
+
+    Rendering stays on the script thread so no st elements are recorded by
+    the cache; on a cache hit the final text is returned straight away.
+    Streamlit only honours Stop/rerun when the script thread touches an st
+    element, so while no chunk arrives (thinking, retry backoff) the
+    placeholder is re-rendered every half second. On Stop/rerun the script
+    thread leaves at once; the worker finishes its in-flight request in the
+    background and abandons the stream at its first chunk.
+    """
+    updates = queue.Queue()
+    cancelled = threading.Event()
+
+    def on_text(text):
+        if cancelled.is_set():
+            raise _StreamCancelled()
+        updates.put(text)
+
+    ctx = get_script_run_ctx()
+    ex = ThreadPoolExecutor(max_workers=1, initializer=add_script_run_ctx, initargs=(None, ctx))
+    try:
+        future = ex.submit(_generate_cached, images, prompt_text, thinking_budget, GEMINI_MODEL, _on_text=on_text)
+        text = "⏳ _Waiting for Gemini..._"
+        while not (future.done() and updates.empty()):
+            try:
+                text = updates.get(timeout=0.5)
+            except queue.Empty:
+                if not future.done():
+                    # Heartbeat: gives Streamlit a chance to raise its stop/rerun exception here
+                    placeholder.markdown(text)
+                continue
+            # Skip to the newest partial text if several chunks queued up
+            while not updates.empty():
+                text = updates.get_nowait()
+            placeholder.markdown(text)
+        return future.result()
+    finally:
+        cancelled.set()
+        ex.shutdown(wait=False)
+
+ALL_IMAGES_LABEL = "All Images"
+BATCH_INSTRUCTION = (
+    "\n\nYou are given {n} images. Analyze each image separately and return one section per image. "
+    "Start every section with a line of the form '### Image <number>' (Image 1 to Image {n}), "
+    "in the same order the images were supplied. Keep these headings in English."
+)
+# Only the '###' level the instruction asks for; deeper sub-headings like '#### Image 1 details' are body text
+_IMAGE_SECTION_RE = re.compile(r"^[ \t]*###(?!#)[ \t]*\**[ \t]*Image[ \t]+(\d+)\b.*$", re.IGNORECASE | re.MULTILINE)
+
+def split_batched_response(text: str, n: int):
+    """Split a batched response into (preamble, per-image sections); None if it doesn't parse.
+
+    The first '### Image k' heading for each k starts that image's section;
+    any text before '### Image 1' is returned as the preamble.
+    """
+    first = {}
+    for m in _IMAGE_SECTION_RE.finditer(text):
+        num = int(m.group(1))
+        if 1 <= num <= n and num not in first:
+            first[num] = m
+    if len(first) != n:
+        return None
+    heads = [first[num] for num in range(1, n + 1)]
+    if any(a.start() >= b.start() for a, b in zip(heads, heads[1:])):
+        return None
+    ends = [m.start() for m in heads[1:]] + [len(text)]
+    preamble = text[:heads[0].start()].strip()
+    return preamble, [text[m.end():end].strip() for m, end in zip(heads, ends)]
+
+def analyze_images(image_parts, prompt_text: str, thinking_budget: int = 0, separate: bool = False, placeholder=None):
+    """Run one prompt over (bytes, mime_type) images, returning (label, output) pairs.
+
+    By default all images go out in a single Gemini request, streamed into
+    `placeholder` when given; `separate` sends one request per image
+    (concurrently) for isolated analyses. Normally there is one pair per
+    image, preceded by an "All Images" pair when the batched answer opens
+    with shared text; a failed or unsplittable batched call yields a single
+    "All Images" pair instead of repeating the same text for every image.
+    """
+    if not image_parts:
+        return []
+    n = len(image_parts)
+    if separate and n > 1:
+        # Requests are pure network I/O, so fan them out over threads; map keeps image order
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, n),
+            initializer=add_script_run_ctx, initargs=(None, ctx)
+        ) as ex:
+            outputs = list(ex.map(
+                lambda part: call_gemini_with_image(part[0], prompt_text, thinking_budget, part[1]), image_parts
+            ))
+        return [(f"Image {idx+1}", output) for idx, output in enumerate(outputs)]
+
+    if n > 1:
+        prompt_text += BATCH_INSTRUCTION.format(n=n)
+    try:
+        if placeholder is not None:
+            text = _stream_into(placeholder, tuple(image_parts), prompt_text, thinking_budget)
+        else:
+            text = _generate_cached(tuple(image_parts), prompt_text, thinking_budget, GEMINI_MODEL)
+    except Exception as e:
+        text = f"⚠️ Error calling Gemini API: {e}"
+        split = ("", [text]) if n == 1 else None
+    else:
+        split = ("", [text]) if n == 1 else split_batched_response(text, n)
+    finally:
+        if placeholder is not None:
+            placeholder.empty()
+    if split is None:
+        # The model ignored the section format (or the call failed): keep one combined answer
+        return [(ALL_IMAGES_LABEL, text)]
+    preamble, sections = split
+    pairs = [(ALL_IMAGES_LABEL, preamble)] if preamble else []
+    return pairs + [(f"Image {idx+1}", section) for idx, section in enumerate(sections)]
+
+def per_image_outputs(outputs):
+    """The pairs that belong to individual images, or the combined answer if there are none."""
+    return [pair for pair in outputs if pair[0] != ALL_IMAGES_LABEL] or outputs
+
+# ---------------------------
+# IMAGE PREPARATION
+# ---------------------------
+@st.cache_data(show_spinner=False, max_entries=64)
+def prepare_image(raw: bytes, mime_type: str):
+    """Turns an upload into API-ready (bytes, mime_type, size_mb), once per unique upload."""
+    image = Image.open(io.BytesIO(raw))
+    # Small-enough JPEG/PNG/WebP uploads are forwarded byte-for-byte, skipping a decode + re-encode
+    if (
+        mime_type in PASSTHROUGH_MIME_TYPES
+        and max(image.size) <= MAX_IMAGE_DIM
+        and len(raw) <= MAX_PASSTHROUGH_BYTES
+    ):
+        return raw, mime_type, len(raw) / (1024 * 1024)
+    # Phone photos (and HEIC, which browsers can't show) are re-encoded as downscaled JPEG
+    image.thumbnail((MAX_IMAGE_DIM, MAX_IMAGE_DIM), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    image.convert("RGB").save(buf, format="JPEG", quality=85, optimize=True)
+    image_bytes = buf.getvalue()
+    return image_bytes, "image/jpeg", len(image_bytes) / (1024 * 1024)
+
+# ---------------------------
+# PROMPTS
+# ---------------------------
+PROMPT_FIND_DISEASE = (
+    "You are an expert plant pathologist. Analyze all the image and:\n"
+    "1️⃣ Identify the most likely disease(s) or disorders.\n"
+    "2️⃣ Describe key visible symptoms.\n"
+    "3️⃣ Suggest probable causal agents (fungus/bacteria/virus/stress).\n"
+    "4️⃣ Give confidence level and further confirmation steps.note..please remind strictly that you have to give every response in Bengali language"
+)
+
+PROMPT_SUGGESTIONS = (
+    "You are an experienced crop protection specialist. Based on the supplied image and probable issue, give:\n"
+    "A) Immediate actions (removal, isolation, sanitation)\n"
+    "B) Cultural/non-chemical solutions\n"
+    "C) Chemical options (types, active ingredients, safety notes)\n"
+    "D) Monitoring plan and follow-up guidance.note..please remind strictly that you have to give every response in Bengali language"
+)
+
+PROMPT_CUSTOM_TEMPLATE = (
+    "You are a helpful plant pathology assistant. Use the image(s) to inform your answer.\n\n"
+    "User question: {question}\n\n"
+    "Provide a concise, practical answer and list any assumptions you made.note..please remind strictly that you have to give every response in Bengali language"
+)
+
 # ---------------------------
 # MAIN CONTENT
 # ---------------------------
@@ -151,64 +447,42 @@ def call_gemini_with_image(image_bytes: bytes, prompt_text: str, thinking_budget
 # MAIN CONTENT: MULTIPLE IMAGE UPLOAD & GEMINI CALLS
 # ---------------------------
 if uploaded_file:
-    images = []
-    image_bytes_list = []
+    image_parts = []
     image_names = []
+    total_size_mb = 0.0
 
     for file in uploaded_file:
         try:
-            image = Image.open(file)
-            images.append(image)
+            image_bytes, mime_type, size_mb = prepare_image(file.getvalue(), file.type)
+            image_parts.append((image_bytes, mime_type))
+            total_size_mb += size_mb
             image_names.append(file.name)
-            st.image(image, use_container_width=True, caption=f"Uploaded: {file.name}")
-
-            buf = io.BytesIO()
-            image.convert("RGB").save(buf, format="JPEG", quality=90)
-            image_bytes_list.append(buf.getvalue())
+            # Display the same bytes sent to the API instead of letting Streamlit re-encode to PNG
+            st.image(image_bytes, use_container_width=True, caption=f"Uploaded: {file.name}")
 
         except Exception as e:
             st.error(f"Couldn't open image {file.name}: {e}")
             continue
 
-    total_size_mb = sum(len(b) for b in image_bytes_list) / (1024 * 1024)
     if total_size_mb > 18:
         st.warning(f"Total images size {total_size_mb:.1f} MB — near Gemini limit (~20 MB). Consider resizing.")
 
 
-    # --- PROMPTS ---
-    prompt_find_disease = (
-        "You are an expert plant pathologist. Analyze all the image and:\n"
-        "1️⃣ Identify the most likely disease(s) or disorders.\n"
-        "2️⃣ Describe key visible symptoms.\n"
-        "3️⃣ Suggest probable causal agents (fungus/bacteria/virus/stress).\n"
-        "4️⃣ Give confidence level and further confirmation steps.note..please remind strictly that you have to give every response in Bengali language"
-    )
-
-    prompt_suggestions = (
-        "You are an experienced crop protection specialist. Based on the supplied image and probable issue, give:\n"
-        "A) Immediate actions (removal, isolation, sanitation)\n"
-        "B) Cultural/non-chemical solutions\n"
-        "C) Chemical options (types, active ingredients, safety notes)\n"
-        "D) Monitoring plan and follow-up guidance.note..please remind strictly that you have to give every response in Bengali language"
-    )
-
-    custom_user_prompt = st.text_input(
-        "💬 Custom Question",
-        placeholder="e.g. What lab test should I run to confirm fungal infection?"
-    )
-
     # --- HANDLE ACTION BUTTONS ---
     if find_disease:
         st.session_state.comparison_data = []  # Reset on new analysis
         with st.spinner("🔍 Analyzing image(s) for likely disease..."):
-            for idx, img_bytes in enumerate(image_bytes_list):
-                output = call_gemini_with_image(img_bytes, prompt_find_disease, thinking_budget=500)
+            outputs = analyze_images(image_parts, PROMPT_FIND_DISEASE, 500, separate_analysis, st.empty())
+            for label, output in outputs:
                 st.session_state.results.append({
-                    "title": f"🔬 Likely Disease(s) & Diagnostic Clues (Image {idx+1})",
+                    "title": f"🔬 Likely Disease(s) & Diagnostic Clues ({label})",
                     "content": output
                 })
+            rows = per_image_outputs(outputs)
+            per_image = len(rows) == len(image_names)
+            for idx, (label, output) in enumerate(rows):
                 st.session_state.comparison_data.append({
-                    "Image": image_names[idx],
+                    "Image": image_names[idx] if per_image else label,
                     "Disease": output,
                     "Suggestions": "Not yet generated",
                     "Confidence": "N/A"
@@ -217,14 +491,16 @@ if uploaded_file:
 
     if suggestions:
         with st.spinner("🧪 Generating management suggestions..."):
-            for idx, img_bytes in enumerate(image_bytes_list):
-                output = call_gemini_with_image(img_bytes, prompt_suggestions, thinking_budget=400)
+            outputs = analyze_images(image_parts, PROMPT_SUGGESTIONS, 400, separate_analysis, st.empty())
+            for label, output in outputs:
                 st.session_state.results.append({
-                    "title": f"🩺 Practical Suggestions & Monitoring Plan (Image {idx+1})",
+                    "title": f"🩺 Practical Suggestions & Monitoring Plan ({label})",
                     "content": output
                 })
-                # Update the corresponding entry
-                if idx < len(st.session_state.comparison_data):
+            # Update the corresponding entries (only when both runs cover the same rows)
+            rows = per_image_outputs(outputs)
+            if len(rows) == len(st.session_state.comparison_data):
+                for idx, (label, output) in enumerate(rows):
                     st.session_state.comparison_data[idx]["Suggestions"] = output
 
 
@@ -232,16 +508,12 @@ if uploaded_file:
         if not custom_user_prompt.strip():
             st.warning("⚠️ Please type a custom question first.")
         else:
-            combined_prompt = (
-                "You are a helpful plant pathology assistant. Use the image(s) to inform your answer.\n\n"
-                f"User question: {custom_user_prompt}\n\n"
-                "Provide a concise, practical answer and list any assumptions you made.note..please remind strictly that you have to give every response in Bengali language"
-            )
+            combined_prompt = PROMPT_CUSTOM_TEMPLATE.format(question=custom_user_prompt)
             with st.spinner("🤖 Asking the model your custom question..."):
-                for idx, img_bytes in enumerate(image_bytes_list):
-                    output = call_gemini_with_image(img_bytes, combined_prompt, thinking_budget=200)
+                outputs = analyze_images(image_parts, combined_prompt, 200, separate_analysis, st.empty())
+                for label, output in outputs:
                     st.session_state.results.append({
-                        "title": f"❓ Answer to: {custom_user_prompt} (Image {idx+1})",
+                        "title": f"❓ Answer to: {custom_user_prompt} ({label})",
                         "content": output
                     })
 
@@ -256,49 +528,19 @@ if uploaded_file:
             st.dataframe(df, use_container_width=True, height=400)
 
 
-    # --- DISPLAY RESULTS AS CARDS ---
-    if st.session_state.results:
-        st.markdown("---")
-        st.markdown("### 🌾 Results Feed")
-        for result in reversed(st.session_state.results):
-            st.markdown(
-                f"""
-                <div style="
-                    background-color: rgba(255,255,255,0.9);
-                    border-radius: 15px;
-                    padding: 1.2rem;
-                    box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-                    margin-bottom: 1rem;
-                    border: 1px solid #e5e5e5;
-                ">
-                    <h4 style="color:#2b7a0b;">{result['title']}</h4>
-                    <p style="color:#333; font-size:16px; line-height:1.6;">{result['content']}</p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    # Keep only the most recent results so memory and rendering stay bounded
+    st.session_state.results = st.session_state.results[-MAX_RESULTS:]
 
     # --- DISPLAY RESULTS AS CARDS ---
     if st.session_state.results:
         st.markdown("---")
         st.markdown("### 🌾 Results Feed")
-        for result in reversed(st.session_state.results):
-            st.markdown(
-                f"""
-                <div style="
-                    background-color: rgba(255,255,255,0.9);
-                    border-radius: 15px;
-                    padding: 1.2rem;
-                    box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-                    margin-bottom: 1rem;
-                    border: 1px solid #e5e5e5;
-                ">
-                    <h4 style="color:#2b7a0b;">{result['title']}</h4>
-                    <p style="color:#333; font-size:16px; line-height:1.6;">{result['content']}</p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+        # One st.markdown for the whole feed, without unsafe_allow_html: Gemini's markdown
+        # renders like the streamed preview while any HTML in it stays inert
+        st.markdown("\n\n---\n\n".join(
+            f"#### {result['title']}\n\n{result['content']}"
+            for result in reversed(st.session_state.results)
+        ))
 
     st.markdown("---")
     st.info("🌱 Tip: Re-take the photo with better focus if results seem uncertain. This app supports farmers; always confirm key actions with local experts.")
@@ -308,40 +550,7 @@ else:
 st.markdown("<div style='height:80px'></div>", unsafe_allow_html=True)
 
 # --- Footer ---
-st.markdown(
-    """
-    <style>
-    .footer {
-        position: fixed;
-        left: 0;
-        bottom: 0;
-        width: 100%;
-        background-color: #f1f1f1;
-        color: #333;
-        text-align: center;
-        padding: 10px;
-        font-size: 14px;
-        box-shadow: 0 -2px 5px rgba(0,0,0,0.1);
-        z-index: 9999;
-    }
-    .footer .small-text {
-        font-size: 12px;
-        color: #555;
-        margin-right: 5px;
-    }
-    .footer .big-text {
-        font-size: 16px;
-        font-weight: bold;
-        color: #000;
-    }
-    </style>
-    <div class="footer">
-        <span class="small-text">Made by</span>
-        <span class="big-text">IFTAKHAR</span>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 
 